@@ -1,33 +1,48 @@
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, delete, insert, update, bindparam, lambda_stmt
+from sqlalchemy.orm import selectinload, raiseload
+import orjson
+from typing import AsyncIterator, List, Optional
+from urllib.parse import quote
+from pydantic import TypeAdapter
 
 from core.config import settings
-from core.database import init_db, get_db
-from models.article import SearchRequest, SearchResponse, SearchDB, ArticleDB, SearchSchema, ArticleSchema
+from core.database import init_db, get_db, AsyncSessionLocal
+from models.article import SearchRequest, SearchResponse, SearchDB, ArticleDB, SearchSchema, SearchSummarySchema, ArticleSchema, PDFItem
 from services.original_spider import OriginalScholarSpider
 from services.export import ExportService
 from services.pdf_downloader import PDFDownloader
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
-    yield
+    # One downloader (and its aiohttp connection pool) for the app lifetime
+    async with PDFDownloader() as pdf_downloader:
+        app.state.pdf_downloader = pdf_downloader
+        yield
     # Shutdown
 
 
+def get_pdf_downloader(request: Request) -> PDFDownloader:
+    return request.app.state.pdf_downloader
+
+
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     debug=settings.debug,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -44,25 +59,72 @@ async def health_check():
     return {"status": "healthy", "version": settings.app_version}
 
 
+# Batches larger than this are bulk-loaded with COPY when the database is PostgreSQL (asyncpg)
+COPY_THRESHOLD = 200
+
+
+async def persist_articles(search_id: int, articles: List[ArticleSchema]):
+    """Store a search's articles in a session of its own"""
+    # COPY bypasses column defaults, so created_at is set here for both paths
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "title": article.title,
+            "authors": article.authors,
+            "venue": article.venue,
+            "publisher": article.publisher,
+            "year": article.year,
+            "citations": article.citations,
+            "citations_per_year": article.citations_per_year,
+            "description": article.description,
+            "url": article.url,
+            "pdf_url": article.pdf_url,
+            "search_id": search_id,
+            "created_at": created_at
+        }
+        for article in articles
+    ]
+    
+    if not rows:
+        return
+    
+    async with AsyncSessionLocal() as session:
+        try:
+            connection = await session.connection()
+            if len(rows) > COPY_THRESHOLD and connection.dialect.driver == "asyncpg":
+                raw_connection = await connection.get_raw_connection()
+                columns = list(rows[0])
+                await raw_connection.driver_connection.copy_records_to_table(
+                    ArticleDB.__tablename__,
+                    records=[tuple(row[column] for column in columns) for row in rows],
+                    columns=columns
+                )
+            else:
+                # Single executemany INSERT
+                await session.execute(insert(ArticleDB), rows)
+            await session.commit()
+            logger.info("💾 Stored %d articles for search %d", len(rows), search_id)
+        except Exception as e:
+            await session.rollback()
+            logger.error("❌ Failed to store %d articles for search %d: %s", len(rows), search_id, e)
+            # The search row was committed with the full count; make history match what was stored
+            try:
+                await session.execute(
+                    update(SearchDB).where(SearchDB.id == search_id).values(total_results=0)
+                )
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error("❌ Failed to reset result count for search %d: %s", search_id, e)
+
+
 @app.post("/api/search", response_model=SearchResponse)
 async def search_articles(
     request: SearchRequest,
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"🔍 Starting search for keyword: '{request.keyword}', num_results: {request.num_results}")
-    
-    search_record = SearchDB(
-        keyword=request.keyword,
-        start_year=request.start_year,
-        end_year=request.end_year
-    )
-    db.add(search_record)
-    await db.commit()
-    await db.refresh(search_record)
+    logger.info("🔍 Starting search for keyword: %r, num_results: %d", request.keyword, request.num_results)
     
     try:
         async with OriginalScholarSpider() as spider:
@@ -74,133 +136,179 @@ async def search_articles(
                 sort_by=request.sort_by
             )
         
-        logger.info(f"📊 Spider returned {len(articles)} articles")
+        logger.info("📊 Spider returned %d articles", len(articles))
         
         # Return empty results if nothing found
         if not articles:
-            logger.warning(f"No results found for '{request.keyword}' - may be blocked by Google Scholar")
+            logger.warning("No results found for %r - may be blocked by Google Scholar", request.keyword)
         
         # Keep original Google Scholar order - sorting will be done on frontend
-        logger.info(f"📈 Maintaining original Google Scholar order for {len(articles)} articles")
+        logger.info("📈 Maintaining original Google Scholar order for %d articles", len(articles))
         
-        # Store articles in database
-        stored_count = 0
-        for article in articles:
-            try:
-                article_db = ArticleDB(
-                    title=article.title,
-                    authors=article.authors,
-                    venue=article.venue,
-                    publisher=article.publisher,
-                    year=article.year,
-                    citations=article.citations,
-                    citations_per_year=article.citations_per_year,
-                    description=article.description,
-                    url=article.url,
-                    pdf_url=article.pdf_url,
-                    search_id=search_record.id
-                )
-                db.add(article_db)
-                stored_count += 1
-            except Exception as e:
-                logger.error(f"❌ Failed to store article '{article.title[:50]}...': {e}")
-        
-        search_record.total_results = len(articles)
+        # The search row is written once the result count is known, in a single INSERT ... RETURNING
+        result = await db.execute(
+            insert(SearchDB)
+            .values(
+                keyword=request.keyword,
+                start_year=request.start_year,
+                end_year=request.end_year,
+                total_results=len(articles)
+            )
+            .returning(SearchDB.id, SearchDB.created_at)
+        )
+        search_id, created_at = result.one()
         await db.commit()
         
-        logger.info(f"✅ Search completed: {len(articles)} articles found, {stored_count} stored in database")
+        # Persist after the response is sent; the response already carries the articles
+        background_tasks.add_task(persist_articles, search_id, articles)
+        
+        logger.info("✅ Search completed: %d articles found, storing in background", len(articles))
         
-        return SearchResponse(
-            search_id=search_record.id,
+        # The spider already produced ArticleSchema objects: skip re-validating them and
+        # return a serialized Response so FastAPI doesn't validate against response_model
+        response = SearchResponse.model_construct(
+            search_id=search_id,
             keyword=request.keyword,
             total_results=len(articles),
+            created_at=created_at,
             articles=articles,
             message=f"Search completed successfully. Found {len(articles)} articles."
         )
+        return Response(response.model_dump_json(), media_type="application/json")
         
     except Exception as e:
         await db.rollback()
-        logger.error(f"❌ Search failed for '{request.keyword}': {str(e)}")
+        logger.error("❌ Search failed for %r: %s", request.keyword, e)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
-@app.get("/api/searches", response_model=List[SearchSchema])
+# Read statements are built once; SQLAlchemy caches their compiled SQL
+# under each lambda's code location instead of rebuilding them per request
+_search_history_stmt = lambda_stmt(
+    lambda: select(SearchDB)
+    .options(raiseload("*"))
+    .order_by(SearchDB.created_at.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_search_history_with_articles_stmt = lambda_stmt(
+    lambda: select(SearchDB)
+    .options(selectinload(SearchDB.articles))
+    .order_by(SearchDB.created_at.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_search_stmt = lambda_stmt(
+    lambda: select(SearchDB)
+    .options(raiseload("*"))
+    .where(SearchDB.id == bindparam("search_id"))
+)
+_search_with_articles_stmt = lambda_stmt(
+    lambda: select(SearchDB)
+    .options(selectinload(SearchDB.articles))
+    .where(SearchDB.id == bindparam("search_id"))
+)
+_search_keyword_stmt = lambda_stmt(
+    lambda: select(SearchDB.keyword).where(SearchDB.id == bindparam("search_id"))
+)
+
+
+@app.get("/api/searches", response_model=List[SearchSchema], response_model_exclude_unset=True)
 async def get_search_history(
     skip: int = 0,
     limit: int = 20,
+    with_articles: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .order_by(SearchDB.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        _search_history_with_articles_stmt if with_articles else _search_history_stmt,
+        {"skip": skip, "limit": limit}
     )
     searches = result.scalars().all()
+    if not with_articles:
+        return [SearchSummarySchema.model_validate(search) for search in searches]
     return searches
 
 
-@app.get("/api/search/{search_id}", response_model=SearchSchema)
+@app.get("/api/search/{search_id}", response_model=SearchSchema, response_model_exclude_unset=True)
 async def get_search_details(
     search_id: int,
+    expand: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
+        _search_with_articles_stmt if expand else _search_stmt,
+        {"search_id": search_id}
     )
     search = result.scalar_one_or_none()
     
     if not search:
         raise HTTPException(status_code=404, detail="Search not found")
     
+    if not expand:
+        return SearchSummarySchema.model_validate(search)
     return search
 
 
+_articles_adapter = TypeAdapter(List[ArticleSchema])
+
+# format -> (encoder, media type, file extension)
+EXPORTERS = {
+    "csv": (ExportService.to_csv, "text/csv", "csv"),
+    "json": (ExportService.to_json, "application/json", "json"),
+    "excel": (ExportService.to_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "bibtex": (ExportService.to_bibtex, "text/plain", "bib"),
+}
+
+
+def _content_disposition(keyword: str, ext: str) -> str:
+    """Attachment header with an ASCII fallback and an RFC 5987 UTF-8 filename"""
+    safe_keyword = quote(keyword[:60], safe="")
+    return (
+        f'attachment; filename="scholar_results.{ext}"; '
+        f"filename*=UTF-8''scholar_results_{safe_keyword}.{ext}"
+    )
+
+
+async def _iter_search_articles(search_id: int) -> AsyncIterator[ArticleSchema]:
+    """Yield a search's articles as they come off a server-side cursor"""
+    # The request-scoped session is closed before a streaming body is sent,
+    # so the stream owns its own session
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(ArticleDB)
+            .where(ArticleDB.search_id == search_id)
+            .order_by(ArticleDB.id)
+            .execution_options(yield_per=500)
+        )
+        # Validate each fetched batch in one pydantic-core call
+        async for partition in result.scalars().partitions():
+            for article in _articles_adapter.validate_python(partition, from_attributes=True):
+                yield article
+
+
 @app.get("/api/export/{search_id}")
 async def export_search_results(
     search_id: int,
     format: str = "csv",
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
-    )
-    search = result.scalar_one_or_none()
-    
-    if not search:
-        raise HTTPException(status_code=404, detail="Search not found")
+    try:
+        encoder, media_type, ext = EXPORTERS[format]
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid export format")
     
-    articles = [ArticleSchema.model_validate(article) for article in search.articles]
+    result = await db.execute(_search_keyword_stmt, {"search_id": search_id})
+    keyword = result.scalar_one_or_none()
     
-    if format == "csv":
-        content = ExportService.to_csv(articles)
-        media_type = "text/csv"
-        filename = f"scholar_results_{search.keyword}.csv"
-    elif format == "json":
-        content = ExportService.to_json(articles)
-        media_type = "application/json"
-        filename = f"scholar_results_{search.keyword}.json"
-    elif format == "excel":
-        content = ExportService.to_excel(articles)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = f"scholar_results_{search.keyword}.xlsx"
-    elif format == "bibtex":
-        content = ExportService.to_bibtex(articles)
-        media_type = "text/plain"
-        filename = f"scholar_results_{search.keyword}.bib"
-    else:
-        raise HTTPException(status_code=400, detail="Invalid export format")
+    if keyword is None:
+        raise HTTPException(status_code=404, detail="Search not found")
     
-    return Response(
-        content=content,
+    return StreamingResponse(
+        encoder(_iter_search_articles(search_id)),
         media_type=media_type,
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": _content_disposition(keyword, ext)
         }
     )
 
@@ -210,17 +318,14 @@ async def delete_search(
     search_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(SearchDB)
-        .options(selectinload(SearchDB.articles))
-        .where(SearchDB.id == search_id)
-    )
-    search = result.scalar_one_or_none()
+    # Bulk deletes avoid loading the search and its articles just to remove them
+    await db.execute(delete(ArticleDB).where(ArticleDB.search_id == search_id))
+    result = await db.execute(delete(SearchDB).where(SearchDB.id == search_id))
     
-    if not search:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Search not found")
     
-    await db.delete(search)
     await db.commit()
     
     return {"message": "Search deleted successfully"}
@@ -229,7 +334,7 @@ async def delete_search(
 from pydantic import BaseModel
 
 class PDFDownloadRequest(BaseModel):
-    articles: List[dict]  # 包含title和url的文章列表
+    articles: List[PDFItem]  # 包含title和url的文章列表
     download_path: Optional[str] = None
 
 class PDFDownloadResponse(BaseModel):
@@ -241,81 +346,79 @@ class PDFDownloadResponse(BaseModel):
 @app.post("/api/download-pdf", response_model=PDFDownloadResponse)
 async def download_pdfs(
     request: PDFDownloadRequest,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    downloader: PDFDownloader = Depends(get_pdf_downloader)
 ):
     """批量下载PDF文件"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"📥 Starting PDF download for {len(request.articles)} articles")
+    logger.info("📥 Starting PDF download for %d articles", len(request.articles))
     
     try:
-        async with PDFDownloader() as downloader:
-            results = await downloader.download_multiple_pdfs(
-                articles=request.articles,
-                download_path=request.download_path,
-                max_concurrent=3
-            )
-        
-        success_count = len(results['successful'])
-        total_count = results['total']
-        logger.info(f"✅ PDF download completed: {success_count}/{total_count} successful")
+        results = await downloader.download_multiple_pdfs(
+            articles=request.articles,
+            download_path=request.download_path,
+            max_concurrent=32
+        )
         
-        # 转换结果格式以匹配响应模型
-        formatted_results = []
-        for item in results['successful']:
-            formatted_results.append({
-                'success': True,
-                'title': item['title'],
-                'filepath': item['filepath']
-            })
-        for item in results['failed']:
-            formatted_results.append({
-                'success': False,
-                'title': item['title'],
-                'url': item['url']
-            })
+        success_count = sum(1 for item in results if item['success'])
+        total_count = len(results)
+        logger.info("✅ PDF download completed: %d/%d successful", success_count, total_count)
         
         return PDFDownloadResponse(
             success=True,
             message=f"Download completed: {success_count}/{total_count} files downloaded successfully",
-            results=formatted_results
+            results=results
         )
         
     except Exception as e:
-        logger.error(f"❌ PDF download failed: {str(e)}")
+        logger.error("❌ PDF download failed: %s", e)
         raise HTTPException(status_code=500, detail=f"PDF download failed: {str(e)}")
 
 
+@app.post("/api/download-pdf/stream")
+async def download_pdfs_stream(
+    request: PDFDownloadRequest,
+    downloader: PDFDownloader = Depends(get_pdf_downloader)
+):
+    """批量下载PDF文件，以NDJSON逐行返回每个完成的结果"""
+    logger.info("📥 Starting streamed PDF download for %d articles", len(request.articles))
+    
+    async def results():
+        async for item in downloader.iter_download_results(
+            articles=request.articles,
+            download_path=request.download_path,
+            max_concurrent=32
+        ):
+            yield orjson.dumps(item) + b"\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.post("/api/download-single-pdf")
 async def download_single_pdf(
     title: str,
     url: str,
-    download_path: Optional[str] = None
+    download_path: Optional[str] = None,
+    downloader: PDFDownloader = Depends(get_pdf_downloader)
 ):
     """下载单个PDF文件"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"📥 Starting single PDF download for: {title}")
+    logger.info("📥 Starting single PDF download for: %s", title)
     
     try:
-        async with PDFDownloader() as downloader:
-            filepath = await downloader.download_article_pdf(
-                article_title=title,
-                article_url=url,
-                download_path=download_path
-            )
+        filepath = await downloader.download_article_pdf(
+            article_title=title,
+            article_url=url,
+            download_path=download_path
+        )
         
         if filepath:
-            logger.info(f"✅ PDF downloaded successfully: {filepath}")
+            logger.info("✅ PDF downloaded successfully: %s", filepath)
             return {
                 "success": True,
                 "message": "PDF downloaded successfully",
                 "filepath": filepath
             }
         else:
-            logger.warning(f"⚠️ PDF download failed for: {title}")
+            logger.warning("⚠️ PDF download failed for: %s", title)
             return {
                 "success": False,
                 "message": "Failed to download PDF - file may not be available",
@@ -323,6 +426,6 @@ async def download_single_pdf(
             }
         
     except Exception as e:
-        logger.error(f"❌ Single PDF download failed: {str(e)}")
+        logger.error("❌ Single PDF download failed: %s", e)
         raise HTTPException(status_code=500, detail=f"PDF download failed: {str(e)}")
 
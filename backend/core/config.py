@@ -12,6 +12,10 @@ class Settings(BaseSettings):
     debug: bool = False
     
     database_url: str = "sqlite+aiosqlite:///../data/scholar.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 1800
+    db_statement_cache_size: int = 1024
     
     cors_origins: list = ["http://localhost:3000", "http://localhost:5173"]
     
@@ -25,6 +29,8 @@ class Settings(BaseSettings):
     max_search_results: int = 1000
     results_per_page: int = 10
     
+    pdf_failed_urls_path: str = "../data/pdf_failed_urls.txt"
+    
     selenium_driver_path: Optional[str] = None
     use_selenium_fallback: bool = True
     
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from core.config import settings
 from models.base import Base
 import os
@@ -7,10 +8,25 @@ import os
 
 os.makedirs("../data", exist_ok=True)
 
+# Keep prepared statements hot for the repeated read queries
+if settings.database_url.startswith("sqlite"):
+    connect_args = {"cached_statements": settings.db_statement_cache_size}
+elif "+asyncpg" in settings.database_url:
+    connect_args = {"statement_cache_size": settings.db_statement_cache_size}
+else:
+    connect_args = {}
+
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
-    future=True
+    future=True,
+    # aiosqlite defaults to NullPool for file databases; pool connections explicitly
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=False,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args=connect_args
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -60,19 +60,22 @@ class ArticleSchema(BaseModel):
         from_attributes = True
 
 
-class SearchSchema(BaseModel):
+class SearchSummarySchema(BaseModel):
     id: Optional[int] = None
     keyword: str
     start_year: Optional[int] = None
     end_year: Optional[int] = None
     total_results: int = 0
     created_at: Optional[datetime] = None
-    articles: List[ArticleSchema] = []
     
     class Config:
         from_attributes = True
 
 
+class SearchSchema(SearchSummarySchema):
+    articles: List[ArticleSchema] = []
+
+
 class SearchRequest(BaseModel):
     keyword: str = Field(..., min_length=1, max_length=200)
     num_results: int = Field(50, ge=10, le=1000)
@@ -85,5 +88,12 @@ class SearchResponse(BaseModel):
     search_id: int
     keyword: str
     total_results: int
+    created_at: Optional[datetime] = None
     articles: List[ArticleSchema]
-    message: str = "Search completed successfully"
\ No newline at end of file
+    message: str = "Search completed successfully"
+
+
+class PDFItem(BaseModel):
+    title: str
+    url: str
+    pdf_url: Optional[str] = None
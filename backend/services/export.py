@@ -1,40 +1,67 @@
-import pandas as pd
-import json
+import csv
+import orjson
 import bibtexparser
 from bibtexparser.bibdatabase import BibDatabase
-from typing import List
+from openpyxl import Workbook
+from typing import AsyncIterable, AsyncIterator, List
 import io
 from models.article import ArticleSchema
 
 
+EXPORT_FIELDS: List[str] = list(ArticleSchema.model_fields)
+
+
 class ExportService:
+    """Encoders that consume articles as they are fetched and yield the payload in chunks"""
+
     @staticmethod
-    def to_csv(articles: List[ArticleSchema]) -> bytes:
-        df = pd.DataFrame([article.dict() for article in articles])
-        buffer = io.BytesIO()
-        df.to_csv(buffer, index=False, encoding='utf-8')
-        return buffer.getvalue()
-    
+    async def to_csv(articles: AsyncIterable[ArticleSchema], flush_every: int = 200) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(EXPORT_FIELDS)
+        pending = 0
+        async for article in articles:
+            writer.writerow(article.model_dump().values())
+            pending += 1
+            if pending >= flush_every:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue().encode('utf-8')
+
     @staticmethod
-    def to_json(articles: List[ArticleSchema]) -> str:
-        return json.dumps([article.dict() for article in articles], indent=2, default=str)
-    
+    async def to_json(articles: AsyncIterable[ArticleSchema]) -> AsyncIterator[bytes]:
+        yield b'['
+        separator = b'\n'
+        async for article in articles:
+            yield separator + orjson.dumps(article.model_dump())
+            separator = b',\n'
+        yield b'\n]'
+
     @staticmethod
-    def to_excel(articles: List[ArticleSchema]) -> bytes:
-        df = pd.DataFrame([article.dict() for article in articles])
+    async def to_excel(articles: AsyncIterable[ArticleSchema]) -> AsyncIterator[bytes]:
+        # xlsx is a zip archive and can only be written out once complete;
+        # write-only mode at least avoids keeping a cell tree for every row
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Articles')
+        sheet.append(EXPORT_FIELDS)
+        async for article in articles:
+            sheet.append(list(article.model_dump().values()))
         buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Articles', index=False)
-        return buffer.getvalue()
-    
+        workbook.save(buffer)
+        yield buffer.getvalue()
+
     @staticmethod
-    def to_bibtex(articles: List[ArticleSchema]) -> str:
-        db = BibDatabase()
-        
-        for i, article in enumerate(articles):
+    async def to_bibtex(articles: AsyncIterable[ArticleSchema]) -> AsyncIterator[bytes]:
+        writer = bibtexparser.bwriter.BibTexWriter()
+        i = 0
+
+        async for article in articles:
+            i += 1
             entry = {
                 'ENTRYTYPE': 'article',
-                'ID': f'article{i+1}',
+                'ID': f'article{i}',
                 'title': article.title,
                 'author': article.authors or 'Unknown',
                 'year': str(article.year) if article.year else '',
@@ -43,9 +70,7 @@ class ExportService:
                 'url': article.url or '',
                 'abstract': article.description or ''
             }
-            
-            entry = {k: v for k, v in entry.items() if v}
-            db.entries.append(entry)
-        
-        writer = bibtexparser.bwriter.BibTexWriter()
-        return writer.write(db)
\ No newline at end of file
+
+            db = BibDatabase()
+            db.entries.append({k: v for k, v in entry.items() if v})
+            yield (('' if i == 1 else writer.entry_separator) + writer.write(db)).encode('utf-8')
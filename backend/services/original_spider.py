@@ -1,13 +1,57 @@
-import requests
+import asyncio
+import httpx
+import logging
 import time
 import re
-from typing import List, Optional
-from bs4 import BeautifulSoup
+from typing import AsyncIterator, List, Optional, Tuple, Union
+import lxml.html
+from lxml import etree
 from datetime import datetime
+from urllib.parse import quote_plus
 
 from core.config import settings
 from models.article import ArticleSchema
 
+logger = logging.getLogger(__name__)
+
+_CITATION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (r'Cited by (\d+)', r'被引用 (\d+)', r'citations?[:\s]*(\d+)')
+]
+_YEAR_PATTERN = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')  # 19xx/20xx not inside a longer number, even next to letters (2019年, 2019a)
+_DIGITS = re.compile(r'\d+')
+ROBOT_KEYWORDS = ('unusual traffic from your computer network', 'not a robot', 'We\'re sorry', 'blocked')
+_ROBOT_RE = re.compile('|'.join(re.escape(keyword) for keyword in ROBOT_KEYWORDS))  # one scan of the page
+RETRY_STATUSES = (429, 503)
+RETRY_ATTEMPTS = 3
+CAPTCHA_TIMEOUT = 120  # seconds to wait for a CAPTCHA to be solved in the Selenium window
+PAGE_WINDOW = 2  # result pages fetched concurrently; later pages are only requested if still needed
+_PDF_REPOSITORY_DOMAINS = ('arxiv.org', 'researchgate.net', 'ieee.org', 'acm.org')
+
+# Result pages are parsed with lxml and queried with precompiled XPath; class
+# tests match on whitespace-separated tokens, as CSS class selectors do.
+_HAS_CLASS = 'contains(concat(" ", normalize-space(@class), " "), " {} ")'
+_GS_OR_XPATH = etree.XPath('//div[%s]' % _HAS_CLASS.format('gs_or'))
+_GS_RT_XPATH = etree.XPath('(.//div[%s])[1]' % _HAS_CLASS.format('gs_rt'))
+_GS_R_XPATH = etree.XPath('(.//div[%s])[1]' % _HAS_CLASS.format('gs_r'))
+_GS_A_XPATH = etree.XPath('(.//div[%s])[1]' % _HAS_CLASS.format('gs_a'))
+_GS_RS_XPATH = etree.XPath('(.//div[%s])[1]' % _HAS_CLASS.format('gs_rs'))
+# Footer links ("Cited by N", "Related articles"); the side PDF box is also gs_fl
+_GS_FL_XPATH = etree.XPath('(.//div[%s][not(%s)])[1]' % (_HAS_CLASS.format('gs_fl'), _HAS_CLASS.format('gs_ggs')))
+_LINKS_XPATH = etree.XPath('.//a[@href]')
+
+
+def _first(nodes: list):
+    return nodes[0] if nodes else None
+
+
+# httpx only decodes brotli bodies when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
 # Selenium imports (optional)
 try:
     from selenium import webdriver
@@ -26,18 +70,20 @@ class OriginalScholarSpider:
         self.startyear_url = '&as_ylo={}'
         self.endyear_url = '&as_yhi={}'
         self.sort_url = '&scisbd={}'  # Sort parameter
-        self.robot_keywords = ['unusual traffic from your computer network', 'not a robot', 'We\'re sorry', 'blocked']
+        self._sort_parts = {'relevance': self.sort_url.format(0), 'date': self.sort_url.format(1)}
         self.session = None
         self.driver = None
+        # Clock read once per search rather than per parsed article
+        self._started_at = datetime.now()
+        self._current_year = self._started_at.year
         
         # Enhanced headers to mimic real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': 'en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate',
             'DNT': '1',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
@@ -47,48 +93,42 @@ class OriginalScholarSpider:
         }
         
     async def __aenter__(self):
-        # Create a requests session with enhanced headers
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # One HTTP/2 client per search: pages are multiplexed over a kept-alive
+        # connection, so the TLS handshake is paid once. The headers carry no
+        # Connection field since HTTP/2 forbids it. A stalled read fails after 15s
+        # instead of holding up the search.
+        self.session = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            follow_redirects=True
+        )
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
-            self.session.close()
+            await self.session.aclose()
         if self.driver:
             self.driver.quit()
     
     def _create_main_url(self, start_year: Optional[int] = None, end_year: Optional[int] = None, sort_by: str = 'relevance') -> str:
         """Create main URL based on year filters and sort option"""
-        gscholar_main_url = self.base_url
-        
-        if start_year:
-            gscholar_main_url = gscholar_main_url + self.startyear_url.format(start_year)
-            
-        if end_year and end_year != datetime.now().year:
-            gscholar_main_url = gscholar_main_url + self.endyear_url.format(end_year)
+        year_part = self.startyear_url.format(start_year) if start_year else ''
+        if end_year and end_year != self._current_year:
+            year_part += self.endyear_url.format(end_year)
         
         # Add sort parameter
         # relevance: 0 (default), date: 1
-        if sort_by == 'date':
-            gscholar_main_url = gscholar_main_url + self.sort_url.format(1)
-        elif sort_by == 'relevance':
-            gscholar_main_url = gscholar_main_url + self.sort_url.format(0)
-            
-        return gscholar_main_url
+        sort_part = self._sort_parts.get(sort_by, '')
+        
+        return f"{self.base_url}{year_part}{sort_part}"
     
     def _get_citations(self, content: str) -> int:
         """Extract citation count from content with improved parsing"""
         # Try multiple patterns for citation extraction
-        patterns = [
-            r'Cited by (\d+)',
-            r'被引用 (\d+)',
-            r'citations?[:\s]*(\d+)',
-        ]
-        
-        import re
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        for pattern in _CITATION_PATTERNS:
+            match = pattern.search(content)
             if match:
                 try:
                     return int(match.group(1))
@@ -105,7 +145,7 @@ class OriginalScholarSpider:
         try:
             citation_text = content[citation_start + 9:citation_end].strip()
             # Extract only digits
-            citation_digits = re.findall(r'\d+', citation_text)
+            citation_digits = _DIGITS.findall(citation_text)
             if citation_digits:
                 return int(citation_digits[0])
         except (ValueError, IndexError):
@@ -113,59 +153,14 @@ class OriginalScholarSpider:
         return 0
     
     def _get_year(self, content: str) -> int:
-        """Extract year from content with improved parsing"""
-        import re
-        
-        # Try multiple year patterns
-        year_patterns = [
-            r'\b(19|20)\d{2}\b',  # 4-digit years starting with 19 or 20
-            r'(\d{4})',           # Any 4-digit number
-            r'- (\d{4})',         # Year after dash
-        ]
-        
-        current_year = datetime.now().year
-        found_years = []
-        
-        for pattern in year_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                try:
-                    year = int(match if isinstance(match, str) else match[0])
-                    # Validate year range (1900 to current year + 1)
-                    if 1900 <= year <= current_year + 1:
-                        found_years.append(year)
-                except (ValueError, IndexError):
-                    continue
-        
-        # Return the most recent valid year found
-        if found_years:
-            return max(found_years)
-        
-        # Fallback to original method
-        try:
-            for char in range(len(content)):
-                if content[char] == '-':
-                    out = content[char - 5:char - 1]
-                    if out.isdigit() and len(out) == 4:
-                        year = int(out)
-                        if 1900 <= year <= current_year + 1:
-                            return year
-        except:
-            pass
-        return 0
-    
-    def _get_author(self, content: str) -> str:
-        """Extract author from content"""
-        try:
-            author_end = content.find('-')
-            return content[2:author_end - 1] if author_end > 2 else content
-        except:
-            return "Author not found"
+        """Extract the most recent plausible year (1900 to next year) from content, 0 if none"""
+        valid = [year for year in map(int, _YEAR_PATTERN.findall(content)) if 1900 <= year <= self._current_year + 1]
+        return max(valid) if valid else 0
     
     def _setup_driver(self):
         """Setup Chrome driver like the original code"""
         if not SELENIUM_AVAILABLE:
-            print("❌ Selenium not available")
+            logger.warning("Selenium not available")
             return None
             
         try:
@@ -177,21 +172,19 @@ class OriginalScholarSpider:
             driver = webdriver.Chrome(options=chrome_options)
             return driver
         except Exception as e:
-            print(f"❌ Failed to setup Chrome driver: {e}")
+            logger.error("Failed to setup Chrome driver: %s", e)
             return None
     
-    def _get_element(self, driver, xpath, attempts=5, count=0):
-        """Safe get_element method with multiple attempts (from original code)"""
-        try:
-            element = driver.find_element(By.XPATH, xpath)
-            return element
-        except Exception as e:
-            if count < attempts:
-                time.sleep(1)
-                return self._get_element(driver, xpath, attempts=attempts, count=count + 1)
-            else:
-                print("Element not found")
-                return None
+    def _get_element(self, driver, xpath, attempts=5):
+        """Safe get_element method with multiple attempts and exponential backoff (1s, 2s, 4s, capped at 5s)"""
+        for attempt in range(attempts):
+            try:
+                return driver.find_element(By.XPATH, xpath)
+            except Exception:
+                if attempt < attempts - 1:
+                    time.sleep(min(2 ** attempt, 5))
+        logger.debug("Element not found: %s", xpath)
+        return None
     
     def _get_content_with_selenium(self, url):
         """Get content with Selenium (adapted from original code)"""
@@ -205,7 +198,7 @@ class OriginalScholarSpider:
             if not self.driver:
                 return None
             
-            print(f"🌐 Opening URL with Selenium: {url}")
+            logger.info("Opening URL with Selenium: %s", url)
             self.driver.get(url)
             
             el = self._get_element(self.driver, "/html/body")
@@ -214,28 +207,40 @@ class OriginalScholarSpider:
                 
             content = el.get_attribute('innerHTML')
             
-            if any(kw in content for kw in self.robot_keywords):
-                print("🚨 CAPTCHA detected! Please solve manually...")
-                print("The browser window should be open. Solve the CAPTCHA and the search will continue automatically.")
-                
-                # Wait for user to solve CAPTCHA
-                # In a production environment, you might implement a more sophisticated solution
-                time.sleep(30)  # Give user time to solve CAPTCHA
+            if _ROBOT_RE.search(content):
+                logger.warning("CAPTCHA detected! Solve it in the open browser window; "
+                               "the search will continue automatically.")
                 
-                # Get content again after CAPTCHA solving
-                self.driver.get(url)
-                el = self._get_element(self.driver, "/html/body")
-                if el:
-                    content = el.get_attribute('innerHTML')
+                # Poll the page the user is solving in place, and carry on as soon
+                # as the robot check is gone (giving up after CAPTCHA_TIMEOUT seconds)
+                deadline = time.monotonic() + CAPTCHA_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(1)
+                    try:
+                        content = self.driver.find_element(By.XPATH, "/html/body").get_attribute('innerHTML')
+                    except Exception:
+                        # Page is mid-navigation after the CAPTCHA was submitted; look again next tick
+                        continue
+                    if not _ROBOT_RE.search(content):
+                        break
             
-            return content.encode('utf-8')
+            return content
             
         except Exception as e:
-            print(f"❌ Selenium error: {e}")
+            logger.error("Selenium error: %s", e)
             return None
     
     def _parse_gs_or_div(self, div) -> Optional[ArticleSchema]:
         """Parse a single gs_or div element to extract article data with improved error handling"""
+        # The block's full text is only needed on fallback paths; compute it at most once
+        cached_text = None
+        
+        def div_text() -> str:
+            nonlocal cached_text
+            if cached_text is None:
+                cached_text = div.text_content().strip()
+            return cached_text
+        
         try:
             # Initialize default values
             title = "Unknown Title"
@@ -252,21 +257,24 @@ class OriginalScholarSpider:
             pdf_url = self._extract_pdf_link(div)
             
             # Title and link - try multiple selectors with more aggressive approach
-            title_elem = div.find('h3')
-            if not title_elem:
+            title_elem = div.find('.//h3')
+            if title_elem is None:
                 # Try more alternative selectors
-                title_elem = (div.find('div', {'class': 'gs_rt'}) or
-                             div.find('a') or
-                             div.find('div', {'class': 'gs_r'}) or
-                             div.find('span'))
+                for candidate in (_first(_GS_RT_XPATH(div)),
+                                  div.find('.//a'),
+                                  _first(_GS_R_XPATH(div)),
+                                  div.find('.//span')):
+                    if candidate is not None:
+                        title_elem = candidate
+                        break
             
-            if title_elem:
-                title_link = title_elem.find('a')
-                if title_link:
-                    title = title_link.text.strip()
+            if title_elem is not None:
+                title_link = title_elem.find('.//a')
+                if title_link is not None:
+                    title = title_link.text_content().strip()
                     url = title_link.get('href', '')
                 else:
-                    title = title_elem.text.strip()
+                    title = title_elem.text_content().strip()
                 
                 # Clean up title - be more lenient
                 if title and title.strip() and title != 'Could not catch title':
@@ -277,66 +285,57 @@ class OriginalScholarSpider:
                     title = "Unknown Title"
             else:
                 # If no title element found, try to extract from any text in the div
-                all_text = div.get_text().strip()
+                all_text = div_text()
                 if all_text:
                     # Take the first meaningful line as title
                     lines = [line.strip() for line in all_text.split('\n') if line.strip()]
                     if lines:
                         title = lines[0][:100]  # First line, max 100 chars
-                        print(f"📝 Extracted title from div text: {title[:50]}...")
+                        logger.debug("Extracted title from div text: %s...", title[:50])
                     else:
                         title = "Unknown Title"
                 else:
                     title = "Unknown Title"
             
-            # Citations with improved extraction
-            citations = self._get_citations(str(div))
+            # Citations with improved extraction, scanning only the footer links
+            gs_fl_div = _first(_GS_FL_XPATH(div))
+            citations = self._get_citations(
+                etree.tostring(gs_fl_div, encoding='unicode', with_tail=False) if gs_fl_div is not None else ''
+            )
             
             # Author info from gs_a div
-            gs_a_div = div.find('div', {'class': 'gs_a'})
-            if gs_a_div:
-                gs_a_text = gs_a_div.text.strip()
+            gs_a_div = _first(_GS_A_XPATH(div))
+            if gs_a_div is not None:
+                gs_a_text = gs_a_div.text_content().strip()
                 
                 # Year with improved parsing
                 year = self._get_year(gs_a_text)
                 
-                # Author with improved parsing
-                author = self._get_author(gs_a_text)
-                if not author or author == "Author not found":
+                # "Authors - Venue, Year - Publisher": split once and reuse the parts
+                dash_parts = gs_a_text.split('-')
+                comma_parts = gs_a_text.split(',')
+                
+                # Author: the text before the first dash, sliced as the original spider did
+                author_end = len(dash_parts[0]) if len(dash_parts) > 1 else -1
+                author = gs_a_text[2:author_end - 1] if author_end > 2 else gs_a_text
+                if not author:
                     # Try to extract first part before comma or dash
-                    try:
-                        first_part = gs_a_text.split(',')[0].split('-')[0].strip()
-                        if first_part and len(first_part) > 2:
-                            author = first_part
-                    except:
-                        author = "Unknown Author"
+                    first_part = comma_parts[0].split('-')[0].strip()
+                    if len(first_part) > 2:
+                        author = first_part
                 
-                # Publisher and venue with improved parsing
-                try:
-                    parts = gs_a_text.split("-")
-                    if len(parts) > 1:
-                        publisher = parts[-1].strip()
-                        if not publisher:
-                            publisher = "Unknown Publisher"
-                    
-                    if len(parts) > 2:
-                        venue_part = parts[-2]
-                        venue = " ".join(venue_part.split(",")[:-1]).strip()
-                        if not venue:
-                            venue = "Unknown Venue"
-                    elif len(parts) > 1:
-                        # Try to extract venue from the middle part
-                        middle_parts = gs_a_text.split(",")
-                        if len(middle_parts) > 1:
-                            venue = middle_parts[-2].strip()
-                except Exception as e:
-                    print(f"Warning: Failed to parse publisher/venue: {e}")
-                    # Keep default values
+                # Publisher after the last dash, venue from the segment before it
+                if len(dash_parts) > 1:
+                    publisher = dash_parts[-1].strip() or "Unknown Publisher"
+                if len(dash_parts) > 2:
+                    venue = " ".join(dash_parts[-2].split(",")[:-1]).strip() or "Unknown Venue"
+                elif len(dash_parts) > 1 and len(comma_parts) > 1:
+                    venue = comma_parts[-2].strip()
             
             # Description from gs_rs div
-            gs_rs_div = div.find('div', {'class': 'gs_rs'})
-            if gs_rs_div:
-                description = gs_rs_div.text.strip()
+            gs_rs_div = _first(_GS_RS_XPATH(div))
+            if gs_rs_div is not None:
+                description = gs_rs_div.text_content().strip()
                 if description:
                     # Clean up description
                     description = description.replace('\n', ' ').replace('\r', ' ').strip()
@@ -344,23 +343,25 @@ class OriginalScholarSpider:
             # Calculate citations per year
             citations_per_year = 0.0
             if year > 0 and citations > 0:
-                years_passed = max(1, datetime.now().year - year)
+                years_passed = max(1, self._current_year - year)
                 citations_per_year = round(citations / years_passed, 2)
             
             # Be more lenient with title requirements - accept any non-empty title
             if not title or title.strip() == "" or title == "Unknown Title":
                 # Try to get any text from the div as fallback
-                all_text = div.get_text().strip()
+                all_text = div_text()
                 if all_text and len(all_text) > 5:  # Lowered threshold from 10 to 5
                     title = all_text[:100] + "..." if len(all_text) > 100 else all_text
-                    print(f"📝 Using fallback title: {title[:50]}...")
+                    logger.debug("Using fallback title: %s...", title[:50])
                 else:
                     # Even if we can't get a good title, still try to extract the article
                     # as it might have useful citation/author information
-                    title = f"Article from {datetime.now().strftime('%Y-%m-%d')}"
-                    print(f"⚠️  Using generic title for article with citation data")
+                    title = f"Article from {self._started_at.strftime('%Y-%m-%d')}"
+                    logger.debug("Using generic title for article with citation data")
             
-            return ArticleSchema(
+            # Every value above is already a plain str/int/float of the right type, so
+            # skip validation here; the fallback records below still go through it
+            return ArticleSchema.model_construct(
                 title=title,
                 authors=author,
                 venue=venue,
@@ -374,13 +375,13 @@ class OriginalScholarSpider:
             )
             
         except Exception as e:
-            print(f"Error parsing article: {e}")
+            logger.warning("Error parsing article: %s", e)
             # Try to extract at least basic info - be more aggressive about saving articles
             try:
-                basic_text = div.get_text().strip()
+                basic_text = div_text()
                 if basic_text and len(basic_text) > 5:  # Lowered threshold
                     # Try to extract any citations even in fallback mode
-                    fallback_citations = self._get_citations(str(div))
+                    fallback_citations = self._get_citations(etree.tostring(div, encoding='unicode', with_tail=False))
                     return ArticleSchema(
                         title=basic_text[:100] + "..." if len(basic_text) > 100 else basic_text,
                         authors="Unknown Author",
@@ -395,9 +396,9 @@ class OriginalScholarSpider:
                     )
                 else:
                     # Even if we have very little info, create a minimal record
-                    print(f"⚠️  Creating minimal record for div with limited content")
+                    logger.debug("Creating minimal record for div with limited content")
                     return ArticleSchema(
-                        title=f"Untitled Article {datetime.now().strftime('%H:%M:%S')}",
+                        title=f"Untitled Article {self._started_at.strftime('%H:%M:%S')}",
                         authors="Unknown Author",
                         venue="Unknown Venue",
                         publisher="Unknown Publisher",
@@ -409,10 +410,10 @@ class OriginalScholarSpider:
                         pdf_url=None
                     )
             except Exception as fallback_error:
-                print(f"❌ Complete fallback failed: {fallback_error}")
+                logger.error("Complete fallback failed: %s", fallback_error)
                 # Last resort - return a minimal record rather than None
                 return ArticleSchema(
-                    title=f"Parse Error Article {datetime.now().strftime('%H:%M:%S')}",
+                    title=f"Parse Error Article {self._started_at.strftime('%H:%M:%S')}",
                     authors="Parse Error",
                     venue="Parse Error",
                     publisher="Parse Error",
@@ -429,53 +430,73 @@ class OriginalScholarSpider:
         Extract PDF link from Google Scholar article div
         """
         try:
-            # Look for PDF links in various formats
-            # 1. Look for direct PDF links in anchor tags
-            pdf_links = div.find_all('a', href=True)
-            for link in pdf_links:
+            # Single pass over the links: a direct PDF link wins outright, while the
+            # first arxiv/researchgate/ieee/acm link is kept as a fallback since
+            # these sites often have PDF versions. The gs_or_ggsm side box links
+            # are part of the same result block, so they are covered here too.
+            fallback = None
+            for link in _LINKS_XPATH(div):
                 href = link.get('href', '')
-                text = link.get_text().strip().lower()
                 
-                # Check if this is a PDF link
-                if (href.endswith('.pdf') or
-                    'pdf' in text or
-                    'filetype:pdf' in href or
-                    '.pdf' in href):
-                    # Make sure it's a valid URL
+                # Check if this is a PDF link, and make sure it's a valid URL
+                if ('.pdf' in href or 'filetype:pdf' in href or
+                        'pdf' in link.text_content().lower()):
                     if href.startswith('http'):
                         return href
                     elif href.startswith('/'):
                         return f"https://scholar.google.com{href}"
-            
-            # 2. Look for PDF links in specific Google Scholar patterns
-            # Sometimes PDFs are in gs_or_ggsm divs with specific classes
-            gs_or_divs = div.find_all('div', {'class': ['gs_or_ggsm', 'gs_md_wp gs_ttss']})
-            for gs_div in gs_or_divs:
-                pdf_links = gs_div.find_all('a', href=True)
-                for link in pdf_links:
-                    href = link.get('href', '')
-                    if href.endswith('.pdf') or '.pdf' in href:
-                        if href.startswith('http'):
-                            return href
-            
-            # 3. Look for arxiv, researchgate, or other repository links that might have PDFs
-            for link in pdf_links:
-                href = link.get('href', '')
-                if any(domain in href.lower() for domain in ['arxiv.org', 'researchgate.net', 'ieee.org', 'acm.org']):
-                    # These sites often have PDF versions
+                
+                if fallback is None and any(domain in href.lower() for domain in _PDF_REPOSITORY_DOMAINS):
                     if 'arxiv.org' in href and '/abs/' in href:
                         # Convert arxiv abstract link to PDF link
-                        pdf_href = href.replace('/abs/', '/pdf/') + '.pdf'
-                        return pdf_href
+                        fallback = href.replace('/abs/', '/pdf/') + '.pdf'
                     elif href.startswith('http'):
-                        return href
+                        fallback = href
             
-            return None
+            return fallback
             
         except Exception as e:
-            print(f"Error extracting PDF link: {e}")
+            logger.warning("Error extracting PDF link: %s", e)
             return None
     
+    async def _fetch_page(self, url: str, semaphore: asyncio.Semaphore) -> str:
+        """Fetch one results page, holding a concurrency slot plus the politeness delay
+        
+        The body is decoded once, with the charset the server declares (utf-8 otherwise).
+        429/503 responses are retried with exponential backoff, except for a robot check
+        (Google serves its CAPTCHA page as a 429), which is returned at once. A page still
+        rate limited after the retries is returned too, so the caller's robot check and
+        end-of-results handling see it; any other error status is raised.
+        """
+        async with semaphore:
+            for attempt in range(RETRY_ATTEMPTS):
+                page = await self.session.get(url)
+                await asyncio.sleep(0.5)
+                if page.status_code not in RETRY_STATUSES or _ROBOT_RE.search(page.text):
+                    break
+                # Rate limited or unavailable: back off (1s, 2s, 4s) rather than parse the error page
+                if attempt < RETRY_ATTEMPTS - 1:
+                    await asyncio.sleep(2 ** attempt)
+        if page.status_code not in RETRY_STATUSES:
+            page.raise_for_status()
+        return page.text
+    
+    async def _iter_pages(self, urls: List[str]) -> AsyncIterator[Tuple[int, str, Union[str, BaseException]]]:
+        """Yield (page index, url, body or error) in order, fetching PAGE_WINDOW pages at a time
+        
+        The next window is only requested once the caller has consumed the current one,
+        so stopping early (end of results, limit reached) leaves the remaining pages unfetched.
+        """
+        semaphore = asyncio.Semaphore(PAGE_WINDOW)
+        for start in range(0, len(urls), PAGE_WINDOW):
+            window = urls[start:start + PAGE_WINDOW]
+            pages = await asyncio.gather(
+                *(self._fetch_page(url, semaphore) for url in window),
+                return_exceptions=True
+            )
+            for i, (url, content) in enumerate(zip(window, pages), start):
+                yield i, url, content
+    
     async def search(self, keyword: str, num_results: int = 50,
                     start_year: Optional[int] = None,
                     end_year: Optional[int] = None,
@@ -491,98 +512,95 @@ class OriginalScholarSpider:
         """
         
         articles = []
+        self._started_at = datetime.now()
+        self._current_year = self._started_at.year
         gscholar_main_url = self._create_main_url(start_year, end_year, sort_by)
         
-        print(f"🔍 Searching Google Scholar for '{keyword}' (target: {num_results} results)")
-        print(f"📊 Sort by: {sort_by}")
-        print(f"🌐 Using URL pattern: {gscholar_main_url}")
+        logger.info("Searching Google Scholar for %r (target: %d results, sort by %s)", keyword, num_results, sort_by)
+        logger.debug("Using URL pattern: %s", gscholar_main_url)
+        
+        # Pages of 10, fetched PAGE_WINDOW at a time and only as far as results continue
+        encoded_keyword = quote_plus(keyword)
+        urls = [gscholar_main_url.format(n, encoded_keyword) for n in range(0, num_results, 10)]
+        logger.debug("Fetching up to %d pages", len(urls))
+        debug = logger.isEnabledFor(logging.DEBUG)
         
-        # Get content from URLs in batches of 10
-        for n in range(0, num_results, 10):
-            url = gscholar_main_url.format(str(n), keyword.replace(' ', '+'))
-            print(f"📖 Fetching page {n//10 + 1}, URL: {url}")
+        async for page_index, url, content in self._iter_pages(urls):
+            page_number = page_index + 1
+            logger.debug("Processing page %d, URL: %s", page_number, url)
             
             try:
-                # Make request
-                page = self.session.get(url)
-                content = page.content
+                if isinstance(content, BaseException):
+                    raise content
                 
                 # Check for robot detection
-                content_str = content.decode('ISO-8859-1', errors='ignore')
-                if any(kw in content_str for kw in self.robot_keywords):
-                    print("🤖 Robot checking detected, trying Selenium...")
+                if _ROBOT_RE.search(content):
+                    logger.warning("Robot checking detected, trying Selenium...")
                     # Use Selenium fallback like the original code
                     try:
-                        content = self._get_content_with_selenium(url)
+                        # Selenium blocks, so keep it off the event loop
+                        content = await asyncio.get_running_loop().run_in_executor(
+                            None, self._get_content_with_selenium, url
+                        )
                         if not content:
-                            print("❌ Selenium fallback failed")
-                            continue
+                            # Still blocked: later pages would be too, so stop requesting them
+                            logger.warning("Selenium fallback failed, stopping search")
+                            break
                     except Exception as e:
-                        print(f"❌ Selenium error: {e}")
-                        continue
-                
-                # Parse with BeautifulSoup
-                soup = BeautifulSoup(content, 'html.parser', from_encoding='utf-8')
+                        logger.error("Selenium error, stopping search: %s", e)
+                        break
                 
-                # Find articles using the original selector
-                mydivs = soup.findAll("div", {"class": "gs_or"})
-                print(f"📄 Found {len(mydivs)} article divs on this page")
+                # Parse with lxml and find articles using the original selector
+                try:
+                    mydivs = _GS_OR_XPATH(lxml.html.document_fromstring(content))
+                except etree.ParserError:
+                    mydivs = []  # empty document
                 
                 if not mydivs:
-                    print("⚠️  No articles found, might be blocked or end of results")
+                    logger.info("No articles found on page %d, might be blocked or end of results", page_number)
                     break
                 
-                # Parse each article with comprehensive logging
+                # Parse each article, with per-article detail only at DEBUG level
                 page_articles = 0
                 failed_articles = 0
                 skipped_articles = 0
                 
-                print(f"🔍 Processing {len(mydivs)} article divs on page {n//10 + 1}")
-                
                 for i, div in enumerate(mydivs):
                     if len(articles) >= num_results:
                         skipped_articles += 1
                         continue
-                        
-                    print(f"📝 Processing article {i+1}/{len(mydivs)} on page {n//10 + 1}")
                     
                     article = self._parse_gs_or_div(div)
                     if article:
                         articles.append(article)
                         page_articles += 1
-                        print(f"✅ Parsed: {article.title[:60]}... ({article.citations} citations, {article.year or 'N/A'})")
+                        if debug:
+                            logger.debug("Parsed: %s... (%s citations, %s)",
+                                         article.title[:60], article.citations, article.year or 'N/A')
                     else:
                         failed_articles += 1
-                        print(f"❌ Failed to parse article {i+1} - this should not happen with new fallback logic")
-                        # Debug: print the div content that failed
-                        div_text = div.get_text()[:200] if div else "No div content"
-                        print(f"🔍 Failed div content preview: {div_text}...")
+                        if debug:
+                            logger.debug("Failed to parse article %d, content preview: %s...",
+                                         i + 1, div.text_content()[:200])
                 
-                print(f"📊 Page {n//10 + 1} Summary:")
-                print(f"   - Found {len(mydivs)} divs")
-                print(f"   - Successfully parsed: {page_articles}")
-                print(f"   - Failed to parse: {failed_articles}")
-                print(f"   - Skipped (limit reached): {skipped_articles}")
-                print(f"   - Total articles so far: {len(articles)}")
+                logger.info(
+                    "Page %d: %d divs, %d parsed, %d failed, %d skipped (limit reached), %d articles so far",
+                    page_number, len(mydivs), page_articles, failed_articles, skipped_articles, len(articles)
+                )
                 
                 # If we got no articles from this page, it might indicate end of results
-                if page_articles == 0 and len(mydivs) > 0:
-                    print("⚠️  No articles parsed from this page despite finding divs - investigating...")
-                    # Debug: show what divs we found
+                if page_articles == 0 and debug:
+                    logger.debug("No articles parsed from page %d despite finding divs", page_number)
                     for i, div in enumerate(mydivs[:3]):  # Show first 3 divs
-                        print(f"🔍 Div {i+1} classes: {div.get('class', [])}")
-                        print(f"🔍 Div {i+1} content preview: {div.get_text()[:100]}...")
+                        logger.debug("Div %d classes: %s, content preview: %s...",
+                                     i + 1, div.get('class', '').split(), div.text_content()[:100])
                 
                 if len(articles) >= num_results:
                     break
                 
-                # Original delay
-                print("⏳ Waiting 0.5s before next request...")
-                time.sleep(0.5)
-                
             except Exception as e:
-                print(f"❌ Error fetching page {n//10 + 1}: {e}")
+                logger.error("Error fetching page %d: %s", page_number, e)
                 continue
         
-        print(f"🎉 Search completed: {len(articles)} articles found")
-        return articles
\ No newline at end of file
+        logger.info("Search completed: %d articles found", len(articles))
+        return articles
@@ -1,19 +1,111 @@
 import os
 import re
 import asyncio
+import contextlib
+import functools
+import hashlib
+import sqlite3
+import uuid
+from collections import OrderedDict
+import aiofiles
 import aiohttp
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import logging
 
+from core.config import settings
+from models.article import PDFItem
+
 logger = logging.getLogger(__name__)
 
+PDF_MAGIC = b'%PDF'
+CHUNK_SIZE = 64 * 1024  # 流式下载的分块大小
+WRITE_BATCH_SIZE = 1024 * 1024  # 每次写盘的数据量
+MAX_PDF_BYTES = 200 * 1024 * 1024  # 超过此大小的响应不可能是正常论文，直接放弃
+MIN_PDF_BYTES = 100  # 小于此大小的"PDF"只可能是错误页或空文件
+HTML_PREFIX_BYTES = 64 * 1024  # 落地页只读取前64KB：跳转和PDF链接几乎总在页面开头
+SUCCESSFUL_URLS_MAX = 4096  # 记住最近多少篇文章的成功PDF链接，与_extract_pdf_urls的缓存大小一致
+DEDUPE_INDEX_NAME = '.dedupe.db'  # 下载目录中的内容去重索引
+_FILENAME_TRANS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})  # 文件名非法字符 -> '_'
+
+# 自动下载页面解析用到的正则，只在模块加载时编译一次
+_META_REFRESH_RE = re.compile(r'refresh', re.I)
+_META_URL_SPLIT_RE = re.compile(r'url=', re.I)
+_JS_REDIRECT_RES = [
+    re.compile(pattern, re.I) for pattern in (
+        r'window\.location\s*=\s*[\'"]([^\'"]+)[\'"]',
+        r'location\.href\s*=\s*[\'"]([^\'"]+)[\'"]',
+        r'window\.location\.href\s*=\s*[\'"]([^\'"]+)[\'"]'
+    )
+]
+_DOWNLOAD_INDICATORS = (
+    'now downloading', 'download will start', 'downloading',
+    'click here if download', 'if your download does not start'
+)
+_DOWNLOAD_INDICATOR_RE = re.compile('|'.join(map(re.escape, _DOWNLOAD_INDICATORS)), re.I)
+_PDF_URL_INDICATORS = ('pdf', 'download', 'attachment')  # 'pdf'已涵盖'.pdf'
+_PDF_URL_INDICATOR_RE = re.compile('|'.join(map(re.escape, _PDF_URL_INDICATORS)), re.I)
+_BROWSER_REQUIRED_SITES = (
+    'research-collection.ethz.ch',
+    'ieeexplore.ieee.org',
+    'link.springer.com',
+    'dl.acm.org'
+)
+_BROWSER_REQUIRED_SITE_RE = re.compile('|'.join(map(re.escape, _BROWSER_REQUIRED_SITES)))
+_TEXT_XPATH = etree.XPath('//text()')
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+
+def _arxiv_pdf_url(parsed) -> Optional[str]:
+    """arxiv.org/abs/<id> -> arxiv.org/pdf/<id>"""
+    if parsed.path.startswith('/abs/'):
+        return f"{parsed.scheme}://{parsed.netloc}/pdf/{parsed.path[len('/abs/'):]}"
+    return None
+
+
+def _acm_pdf_url(parsed) -> Optional[str]:
+    """dl.acm.org/doi/[abs/]<doi> -> dl.acm.org/doi/pdf/<doi>"""
+    path = parsed.path
+    if path.startswith('/doi/') and not path.startswith('/doi/pdf/'):
+        doi = path[len('/doi/'):]
+        if doi.startswith(('abs/', 'full/', 'epdf/')):
+            doi = doi.split('/', 1)[1]
+        return f"{parsed.scheme}://{parsed.netloc}/doi/pdf/{doi}"
+    return None
+
+
+def _ieee_pdf_url(parsed) -> Optional[str]:
+    """ieeexplore.ieee.org/[abstract/]document/<n> -> ieeexplore.ieee.org/stampPDF/getPDF.jsp?arnumber=<n>"""
+    parts = parsed.path.strip('/').split('/')
+    if parts[0] == 'abstract':  # 谷歌学术给出的IEEE链接是/abstract/document/<n>/
+        parts = parts[1:]
+    if len(parts) >= 2 and parts[0] == 'document' and parts[1].isdigit():
+        return f"{parsed.scheme}://{parsed.netloc}/stampPDF/getPDF.jsp?tp=&arnumber={parts[1]}"
+    return None
+
+
+# 已知站点的PDF链接规则：按主机名后缀分发，只需解析一次netloc
+_HOST_HANDLERS = {
+    'arxiv.org': _arxiv_pdf_url,
+    'dl.acm.org': _acm_pdf_url,
+    'ieeexplore.ieee.org': _ieee_pdf_url,
+}
+
 class PDFDownloader:
-    def __init__(self):
+    def __init__(self, failed_urls_path: Optional[str] = None):
         self.session = None
-        self.failed_urls = set()  # 缓存已知失败的URL，避免重复尝试
+        self.failed_urls = set()  # 缓存已知失败的URL，避免重复尝试；跨进程重启持久化到磁盘
+        self.failed_urls_path = Path(failed_urls_path or settings.pdf_failed_urls_path)
+        self._persisted_failed_count = 0
+        self.successful_urls = OrderedDict()  # 文章URL -> 上次成功下载的PDF链接，按最近使用排序，最多SUCCESSFUL_URLS_MAX条
+        # 浏览器自动化：首次需要时才启动，之后复用
+        self._playwright = None
+        self._browser = None
+        self._browser_lock = asyncio.Lock()
+        self._browser_pages = asyncio.Semaphore(2)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/pdf,application/octet-stream,*/*',
@@ -25,7 +117,20 @@ class PDFDownloader:
         }
     
     async def __aenter__(self):
+        self.failed_urls = self._load_failed_urls()
+        self._persisted_failed_count = len(self.failed_urls)
+        # 连接池按主机限流：不同站点（arXiv、IEEE等）的下载可以并行，
+        # 同一主机最多4个连接并复用；DNS结果缓存10分钟，空闲连接保留30秒，
+        # 同一主机的后续候选链接和重试可以直接复用已完成TLS握手的连接
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=4,
+            ttl_dns_cache=600,
+            keepalive_timeout=30,
+            enable_cleanup_closed=True
+        )
         self.session = aiohttp.ClientSession(
+            connector=connector,
             headers=self.headers,
             timeout=aiohttp.ClientTimeout(total=60)
         )
@@ -34,32 +139,75 @@ class PDFDownloader:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        self._save_failed_urls()
+    
+    def _load_failed_urls(self) -> set:
+        """从磁盘加载之前记录的失败URL，每行一个"""
+        try:
+            with open(self.failed_urls_path, encoding='utf-8') as f:
+                return {line.rstrip('\n') for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+        except OSError as e:
+            logger.warning(f"Could not load failed URL cache {self.failed_urls_path}: {e}")
+            return set()
+    
+    def _save_failed_urls(self):
+        """失败URL有新增时写回磁盘（先写临时文件再替换）"""
+        if len(self.failed_urls) == self._persisted_failed_count:
+            return
+        try:
+            self.failed_urls_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.failed_urls_path.with_name(self.failed_urls_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{url}\n" for url in sorted(self.failed_urls))
+            os.replace(tmp_path, self.failed_urls_path)
+            self._persisted_failed_count = len(self.failed_urls)
+        except OSError as e:
+            logger.warning(f"Could not save failed URL cache {self.failed_urls_path}: {e}")
     
     def _sanitize_filename(self, filename: str) -> str:
         """清理文件名，移除非法字符"""
         # 移除或替换非法字符
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+        filename = filename.translate(_FILENAME_TRANS)
         # 限制长度
         if len(filename) > 200:
             filename = filename[:200]
-        # 确保有.pdf扩展名
-        if not filename.lower().endswith('.pdf'):
+        # 确保有.pdf扩展名（只比较后缀，不复制整个标题）
+        if filename[-4:].lower() != '.pdf':
             filename += '.pdf'
         return filename
     
-    def _is_valid_pdf_url(self, url: str) -> bool:
+    @staticmethod
+    def _is_valid_pdf_url(url: str) -> bool:
         """检查URL是否可能是PDF链接"""
         if not url:
             return False
         
-        # 检查URL是否包含PDF相关的路径或参数
-        pdf_indicators = ['.pdf', 'pdf', 'download', 'attachment']
-        url_lower = url.lower()
-        
-        return any(indicator in url_lower for indicator in pdf_indicators)
+        # 检查URL是否包含PDF相关的路径或参数（所有关键词合并为一个正则，只扫描一遍）
+        return _PDF_URL_INDICATOR_RE.search(url) is not None
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _host_pdf_url(article_url: str) -> Optional[str]:
+        """已知站点（arXiv、ACM、IEEE）由文章URL直接换算出的PDF链接；按主机名后缀分发，只解析一次netloc"""
+        parsed = urlparse(article_url)
+        host = parsed.netloc.lower()
+        for suffix, handler in _HOST_HANDLERS.items():
+            if host == suffix or host.endswith('.' + suffix):
+                return handler(parsed)
+        return None
     
-    def _extract_pdf_urls(self, article_url: str) -> List[str]:
-        """从文章URL中提取可能的PDF链接"""
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _extract_pdf_urls(article_url: str) -> Tuple[str, ...]:
+        """从文章URL中提取可能的PDF链接（按顺序去重；同一URL的结果会被缓存）"""
         pdf_urls = []
         
         # 特殊处理：ETH Zurich - 只尝试最基本的变体，避免重复失败
@@ -76,23 +224,27 @@ class PDFDownloader:
             # 对于ETH，我们知道/download不会工作，所以跳过
             # 这样可以避免不必要的重复尝试
             logger.info(f"ETH URL detected, limiting attempts to avoid known failures: {article_url}")
-            return pdf_urls
+            return tuple(pdf_urls)
         
         # 如果URL本身就是PDF链接
-        if self._is_valid_pdf_url(article_url):
+        if PDFDownloader._is_valid_pdf_url(article_url):
             pdf_urls.append(article_url)
         
+        # 已知站点直接换算出PDF地址，排在通用猜测之前
+        host_pdf_url = PDFDownloader._host_pdf_url(article_url)
+        if host_pdf_url:
+            pdf_urls.append(host_pdf_url)
+        
         # 对于其他网站，尝试常见的PDF URL模式
         base_url = article_url.rstrip('/')
         
-        # 常见的PDF URL后缀
+        # 常见的PDF URL后缀；format参数只用与URL匹配的分隔符，不再两种都试
         pdf_suffixes = [
             '/pdf',
             '.pdf',
             '/download',
             '/attachment',
-            '?format=pdf',
-            '&format=pdf'
+            '&format=pdf' if '?' in base_url else '?format=pdf'
         ]
         
         for suffix in pdf_suffixes:
@@ -100,12 +252,11 @@ class PDFDownloader:
             if pdf_url != article_url:  # 避免重复
                 pdf_urls.append(pdf_url)
         
-        return pdf_urls
+        return tuple(dict.fromkeys(pdf_urls))
     
     async def _handle_auto_download_page(self, url: str, content: str) -> Optional[str]:
         """处理自动下载页面，提取实际的PDF下载链接"""
         try:
-            soup = BeautifulSoup(content, 'html.parser')
             base_url = '/'.join(url.split('/')[:-1]) + '/'
             
             # 特殊处理：ETH Zurich类型的PDF查看器页面
@@ -133,63 +284,65 @@ class PDFDownloader:
                     logger.info(f"Skipping known failed URL: {download_url}")
                     return None
             
+            # 直接用lxml解析（C实现），不经过BeautifulSoup的Python层建树
+            try:
+                tree = lxml.html.document_fromstring(content)
+            except etree.ParserError:
+                return None  # 空页面
+            except ValueError:
+                # 带XML编码声明的页面，lxml只接受其字节形式
+                tree = lxml.html.document_fromstring(content.encode('utf-8'), parser=_UTF8_HTML_PARSER)
+            
             # 检查meta refresh重定向
-            meta_refresh = soup.find('meta', attrs={'http-equiv': re.compile(r'refresh', re.I)})
-            if meta_refresh:
+            meta_refresh = next(
+                (meta for meta in tree.iterfind('.//meta[@http-equiv]')
+                 if _META_REFRESH_RE.search(meta.get('http-equiv'))),
+                None
+            )
+            if meta_refresh is not None:
                 content_attr = meta_refresh.get('content', '')
                 # 解析meta refresh内容，格式通常是 "5;URL=http://example.com/file.pdf"
-                if 'url=' in content_attr.lower():
-                    redirect_url = content_attr.lower().split('url=')[1].strip()
+                parts = _META_URL_SPLIT_RE.split(content_attr, 1)
+                if len(parts) > 1:
+                    redirect_url = parts[1].strip()
                     if redirect_url.startswith('http'):
                         return redirect_url
                     else:
                         return urljoin(base_url, redirect_url)
             
             # 检查JavaScript重定向
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string:
-                    script_content = script.string.lower()
-                    # 查找window.location或location.href重定向
-                    if 'window.location' in script_content or 'location.href' in script_content:
-                        # 尝试提取URL
-                        url_patterns = [
-                            r'window\.location\s*=\s*[\'"]([^\'"]+)[\'"]',
-                            r'location\.href\s*=\s*[\'"]([^\'"]+)[\'"]',
-                            r'window\.location\.href\s*=\s*[\'"]([^\'"]+)[\'"]'
-                        ]
-                        for pattern in url_patterns:
-                            match = re.search(pattern, script_content)
-                            if match:
-                                redirect_url = match.group(1)
-                                if redirect_url.startswith('http'):
-                                    return redirect_url
-                                else:
-                                    return urljoin(base_url, redirect_url)
-            
-            # 查找"Now downloading"或类似文本附近的链接
-            download_indicators = [
-                'now downloading', 'download will start', 'downloading',
-                'click here if download', 'if your download does not start'
-            ]
+            for script in tree.iter('script'):
+                if script.text:
+                    # 查找window.location或location.href重定向（忽略大小写，无需复制整个脚本）
+                    for pattern in _JS_REDIRECT_RES:
+                        match = pattern.search(script.text)
+                        if match:
+                            redirect_url = match.group(1)
+                            if redirect_url.startswith('http'):
+                                return redirect_url
+                            else:
+                                return urljoin(base_url, redirect_url)
             
-            for indicator in download_indicators:
-                text_elements = soup.find_all(text=re.compile(indicator, re.I))
-                for element in text_elements:
-                    # 查找附近的链接
-                    parent = element.parent
-                    if parent:
-                        links = parent.find_all('a', href=True)
-                        for link in links:
-                            href = link.get('href')
-                            if href and self._is_valid_pdf_url(href):
-                                if href.startswith('http'):
-                                    return href
-                                else:
-                                    return urljoin(base_url, href)
+            # 查找"Now downloading"或类似文本附近的链接（所有提示语合并为一个正则，只扫描一遍）
+            for text in _TEXT_XPATH(tree):
+                if not _DOWNLOAD_INDICATOR_RE.search(text):
+                    continue
+                # 查找附近的链接（tail文本属于其所在元素的父元素）
+                parent = text.getparent()
+                if text.is_tail:
+                    parent = parent.getparent()
+                if parent is not None:
+                    links = parent.iterfind('.//a[@href]')
+                    for link in links:
+                        href = link.get('href')
+                        if href and self._is_valid_pdf_url(href):
+                            if href.startswith('http'):
+                                return href
+                            else:
+                                return urljoin(base_url, href)
             
             # 查找所有PDF链接作为后备
-            all_links = soup.find_all('a', href=True)
+            all_links = tree.iterfind('.//a[@href]')
             for link in all_links:
                 href = link.get('href')
                 if href and href.lower().endswith('.pdf'):
@@ -204,46 +357,97 @@ class PDFDownloader:
             logger.error(f"Error handling auto download page: {e}")
             return None
     
-    async def _download_single_pdf(self, url: str, filepath: str, recursion_depth: int = 0) -> bool:
-        """下载单个PDF文件"""
+    @staticmethod
+    async def _read_html_prefix(response: aiohttp.ClientResponse) -> str:
+        """只读取并解码HTML页面的前HTML_PREFIX_BYTES字节，而不是整个页面"""
+        data = bytearray()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            data += chunk
+            if len(data) >= HTML_PREFIX_BYTES:
+                del data[HTML_PREFIX_BYTES:]
+                break
+        try:
+            return data.decode(response.charset or 'utf-8', errors='replace')
+        except LookupError:
+            # 服务器声明了未知编码
+            return data.decode('utf-8', errors='replace')
+    
+    async def _download_single_pdf(self, url: str, filepath: str, recursion_depth: int = 0) -> Optional[str]:
+        """下载单个PDF文件，成功时返回文件内容的哈希（blake2b十六进制），失败返回None"""
         # 防止无限递归
         if recursion_depth > 3:
             logger.warning(f"Maximum recursion depth reached for URL: {url}")
-            return False
+            return None
         
         # 检查是否为已知失败的URL
         if url in self.failed_urls:
             logger.info(f"Skipping known failed URL: {url}")
-            return False
+            return None
             
         try:
             logger.info(f"Attempting to download PDF from: {url} (depth: {recursion_depth})")
             
+            # 这个GET本身就是探测请求：先只看状态码和Content-Type，PDF再只读4字节文件头，
+            # 不符合时直接放弃连接，不会拉取整个响应体；因此无需额外的HEAD/Range往返
             async with self.session.get(url, allow_redirects=True) as response:
                 if response.status == 200:
                     content_type = response.headers.get('content-type', '').lower()
                     
                     # 检查是否为PDF内容
                     if 'application/pdf' in content_type or 'application/octet-stream' in content_type:
-                        content = await response.read()
+                        # 服务器声明的大小明显不合理时，连文件头都不必读
+                        size = response.content_length
+                        if size is not None and not MIN_PDF_BYTES <= size <= MAX_PDF_BYTES:
+                            logger.warning(f"Skipping PDF with implausible Content-Length {size}: {url}")
+                            return None
+                        
+                        # 先只读取文件头进行验证，不把整个文件读入内存
+                        try:
+                            header = await response.content.readexactly(len(PDF_MAGIC))
+                        except asyncio.IncompleteReadError:
+                            header = b''
                         
                         # 验证PDF文件头
-                        if content.startswith(b'%PDF'):
-                            # 确保目录存在
-                            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                            
-                            with open(filepath, 'wb') as f:
-                                f.write(content)
+                        if header == PDF_MAGIC:
+                            # 分块流式写入.part临时文件，完成后再原子替换，避免残缺文件被当作已下载
+                            # 临时文件名带随机后缀：同名文章并发下载时不会写进同一个文件
+                            part_path = f"{filepath}.{uuid.uuid4().hex}.part"
+                            try:
+                                # 攒够WRITE_BATCH_SIZE再写一次，减少write系统调用和线程池切换
+                                buffer = bytearray(header)
+                                hasher = hashlib.blake2b(header)  # 边写边算哈希，用于内容去重
+                                total = len(header)  # 没有Content-Length或其不可信时，边下载边限制大小
+                                async with aiofiles.open(part_path, 'wb') as f:
+                                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                                        total += len(chunk)
+                                        if total > MAX_PDF_BYTES:
+                                            break
+                                        hasher.update(chunk)
+                                        buffer += chunk
+                                        if len(buffer) >= WRITE_BATCH_SIZE:
+                                            await f.write(buffer)
+                                            buffer.clear()
+                                    if buffer:
+                                        await f.write(buffer)
+                                if total > MAX_PDF_BYTES:
+                                    os.remove(part_path)
+                                    logger.warning(f"PDF exceeds {MAX_PDF_BYTES} bytes, aborted: {url}")
+                                    return None
+                                os.replace(part_path, filepath)
+                            except BaseException:
+                                with contextlib.suppress(OSError):
+                                    os.remove(part_path)
+                                raise
                             
                             logger.info(f"Successfully downloaded PDF: {filepath}")
-                            return True
+                            return hasher.hexdigest()
                         else:
                             logger.warning(f"Downloaded content is not a valid PDF: {url}")
                     
                     # 如果不是PDF内容，检查是否为HTML自动下载页面
                     elif 'text/html' in content_type:
                         logger.info(f"Detected HTML page, checking for auto-download: {url}")
-                        content = await response.text()
+                        content = await self._read_html_prefix(response)
                         
                         # 尝试从HTML页面中提取实际的PDF下载链接
                         actual_pdf_url = await self._handle_auto_download_page(url, content)
@@ -261,17 +465,21 @@ class PDFDownloader:
         except Exception as e:
             logger.error(f"Error downloading PDF from {url}: {e}")
         
-        return False
+        return None
     
     def _should_use_browser(self, url: str) -> bool:
         """判断是否需要使用浏览器自动化"""
-        browser_required_sites = [
-            'research-collection.ethz.ch',
-            'ieeexplore.ieee.org',
-            'link.springer.com',
-            'dl.acm.org'
-        ]
-        return any(site in url for site in browser_required_sites)
+        return _BROWSER_REQUIRED_SITE_RE.search(url) is not None
+    
+    async def _get_browser(self):
+        """懒加载浏览器：整个批次（以及之后的请求）共用同一个Chromium进程"""
+        async with self._browser_lock:
+            if self._browser is None:
+                # 尝试导入playwright
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+        return self._browser
     
     async def _download_with_browser(self, url: str, filepath: str) -> bool:
         """使用浏览器自动化下载PDF（实验性功能）"""
@@ -279,84 +487,79 @@ class PDFDownloader:
             return False
         
         try:
-            # 尝试导入playwright
-            from playwright.async_api import async_playwright
+            browser = await self._get_browser()
             
             logger.info(f"Attempting browser automation for: {url}")
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
+            # 限制同时打开的页面数，控制内存占用
+            async with self._browser_pages:
                 page = await browser.new_page()
-                
-                # 设置超时和用户代理
-                page.set_default_timeout(30000)
-                await page.set_extra_http_headers({
-                    'User-Agent': self.headers['User-Agent']
-                })
-                
-                # 导航到页面
-                await page.goto(url, wait_until='networkidle')
-                
-                # 方法1: 等待PDF响应
                 try:
-                    response = await page.wait_for_response(
-                        lambda r: (r.url.endswith('.pdf') or 'application/pdf' in r.headers.get('content-type', ''))
-                                 and r.status == 200,
-                        timeout=15000
-                    )
-                    pdf_content = await response.body()
+                    # 设置超时和用户代理
+                    page.set_default_timeout(30000)
+                    await page.set_extra_http_headers({
+                        'User-Agent': self.headers['User-Agent']
+                    })
                     
-                    if pdf_content and pdf_content.startswith(b'%PDF'):
-                        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                        with open(filepath, 'wb') as f:
-                            f.write(pdf_content)
-                        logger.info(f"Browser automation successful: {filepath}")
-                        await browser.close()
-                        return True
-                        
-                except Exception as e:
-                    logger.info(f"PDF response wait failed: {e}")
-                
-                # 方法2: 查找并点击下载链接
-                download_selectors = [
-                    'a[href*=".pdf"]',
-                    'a[href*="download"]',
-                    'button:has-text("Download")',
-                    'a:has-text("PDF")',
-                    'a:has-text("Download")',
-                    '.download-link',
-                    '[data-download]'
-                ]
-                
-                for selector in download_selectors:
+                    # 导航到页面
+                    await page.goto(url, wait_until='networkidle')
+                    
+                    # 方法1: 等待PDF响应
                     try:
-                        element = await page.query_selector(selector)
-                        if element:
-                            logger.info(f"Found download element: {selector}")
-                            
-                            # 尝试直接获取href
-                            href = await element.get_attribute('href')
-                            if href and href.endswith('.pdf'):
-                                # 直接下载PDF链接
-                                pdf_url = urljoin(url, href)
-                                if await self._download_single_pdf(pdf_url, filepath, 0):
-                                    await browser.close()
-                                    return True
-                            
-                            # 尝试点击下载
-                            async with page.expect_download(timeout=10000) as download_info:
-                                await element.click()
-                            download = await download_info.value
-                            await download.save_as(filepath)
-                            logger.info(f"Browser download successful: {filepath}")
-                            await browser.close()
+                        response = await page.wait_for_response(
+                            lambda r: (r.url.endswith('.pdf') or 'application/pdf' in r.headers.get('content-type', ''))
+                                     and r.status == 200,
+                            timeout=15000
+                        )
+                        pdf_content = await response.body()
+                        
+                        if pdf_content and pdf_content.startswith(b'%PDF'):
+                            async with aiofiles.open(filepath, 'wb') as f:
+                                await f.write(pdf_content)
+                            logger.info(f"Browser automation successful: {filepath}")
                             return True
                             
                     except Exception as e:
-                        logger.debug(f"Download attempt failed for {selector}: {e}")
-                        continue
-                
-                await browser.close()
+                        logger.info(f"PDF response wait failed: {e}")
+                    
+                    # 方法2: 查找并点击下载链接
+                    download_selectors = [
+                        'a[href*=".pdf"]',
+                        'a[href*="download"]',
+                        'button:has-text("Download")',
+                        'a:has-text("PDF")',
+                        'a:has-text("Download")',
+                        '.download-link',
+                        '[data-download]'
+                    ]
+                    
+                    for selector in download_selectors:
+                        try:
+                            element = await page.query_selector(selector)
+                            if element:
+                                logger.info(f"Found download element: {selector}")
+                                
+                                # 尝试直接获取href
+                                href = await element.get_attribute('href')
+                                if href and href.endswith('.pdf'):
+                                    # 直接下载PDF链接
+                                    pdf_url = urljoin(url, href)
+                                    if await self._download_single_pdf(pdf_url, filepath, 0):
+                                        return True
+                                
+                                # 尝试点击下载
+                                async with page.expect_download(timeout=10000) as download_info:
+                                    await element.click()
+                                download = await download_info.value
+                                await download.save_as(filepath)
+                                logger.info(f"Browser download successful: {filepath}")
+                                return True
+                                
+                        except Exception as e:
+                            logger.debug(f"Download attempt failed for {selector}: {e}")
+                            continue
+                finally:
+                    await page.close()
                 
         except ImportError:
             logger.warning("Playwright not installed. To enable browser automation, install with: pip install playwright && playwright install chromium")
@@ -365,15 +568,140 @@ class PDFDownloader:
         
         return False
     
-    async def download_article_pdf(self, article_title: str, article_url: str,
-                                 download_path: Optional[str] = None) -> Optional[str]:
-        """下载单篇文章的PDF"""
+    @staticmethod
+    @contextlib.contextmanager
+    def _dedupe_index(base_path: Path) -> Iterator[sqlite3.Connection]:
+        """打开下载目录的去重索引（内容哈希 -> 文件，文章URL -> 内容哈希），用完即关、正常结束时提交
         
-        # 设置下载路径
+        sqlite是同步IO，只在线程池里使用，不占用事件循环，也不会为每个下载目录长期持有连接。
+        事务以BEGIN IMMEDIATE开始，一开始就拿到写锁：同时下载完成的相同PDF会依次“查找-写入”，
+        后来者一定能看到先完成者的记录。
+        """
+        with contextlib.closing(sqlite3.connect(base_path / DEDUPE_INDEX_NAME, timeout=30)) as index:
+            with index:
+                index.execute(
+                    'CREATE TABLE IF NOT EXISTS pdf_files '
+                    '(hash TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, '
+                    'inode INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)'
+                )
+                index.execute('CREATE TABLE IF NOT EXISTS article_urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)')
+                index.execute('BEGIN IMMEDIATE')
+                yield index
+    
+    @staticmethod
+    def _file_fingerprint(path: str) -> Optional[Tuple[int, int, int]]:
+        """文件的(大小, inode, 修改时间)；文件被替换或改写后会变化"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_ino, st.st_mtime_ns
+    
+    def _indexed_path(self, index: sqlite3.Connection, digest: str) -> Optional[str]:
+        """返回仍然保存着该内容的已下载文件；文件已被删除或覆盖时清除过期记录"""
+        row = index.execute('SELECT path, size, inode, mtime_ns FROM pdf_files WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        if self._file_fingerprint(row[0]) == tuple(row[1:]):
+            return row[0]
+        index.execute('DELETE FROM pdf_files WHERE hash = ?', (digest,))
+        return None
+    
+    @staticmethod
+    def _link_existing(existing_path: str, filepath: str) -> bool:
+        """用硬链接复用已有文件；文件系统不支持时返回False"""
+        try:
+            os.link(existing_path, filepath)
+            return True
+        except OSError:
+            return False
+    
+    def _link_downloaded(self, base_path: Path, article_url: str, filepath: str) -> Optional[str]:
+        """同一文章URL之前已下载过（换了标题）时，把filepath硬链接到现有文件并返回其路径"""
+        with self._dedupe_index(base_path) as index:
+            row = index.execute('SELECT hash FROM article_urls WHERE url = ?', (article_url,)).fetchone()
+            existing_path = row and self._indexed_path(index, row[0])
+            if existing_path and self._link_existing(existing_path, filepath):
+                return existing_path
+        return None
+    
+    def _store_deduplicated(self, digest: str, downloaded_path: str, filepath: str, article_url: str):
+        """把下载好的文件放到filepath；内容与已有文件相同时改为硬链接到已有文件"""
+        with self._dedupe_index(Path(filepath).parent) as index:
+            existing_path = self._indexed_path(index, digest)
+            # filepath即将被覆盖，之前记录在它名下的内容都已失效
+            index.execute('DELETE FROM pdf_files WHERE path = ?', (filepath,))
+            if existing_path and existing_path != filepath and self._link_existing(existing_path, filepath):
+                os.remove(downloaded_path)
+                logger.info(f"Identical PDF already downloaded, linked {filepath} -> {existing_path}")
+            else:
+                os.replace(downloaded_path, filepath)
+                index.execute(
+                    'INSERT OR REPLACE INTO pdf_files (hash, path, size, inode, mtime_ns) VALUES (?, ?, ?, ?, ?)',
+                    (digest, filepath, *self._file_fingerprint(filepath))
+                )
+            index.execute('INSERT OR REPLACE INTO article_urls (url, hash) VALUES (?, ?)', (article_url, digest))
+    
+    async def _download_first_pdf(self, article_url: str, pdf_urls: Tuple[str, ...], filepath: str) -> bool:
+        """同时请求所有候选链接，第一个下载成功的胜出，其余立即取消
+        
+        每个候选先写入各自的临时文件（filepath.<随机后缀>），同一文章的候选之间、
+        以及标题相同的不同文章之间都不会并发写同一文件；
+        只有胜出者会被原子替换为最终的filepath。
+        """
+        candidates = {}
+        for pdf_url in pdf_urls:
+            candidate_path = f"{filepath}.{uuid.uuid4().hex}"
+            task = asyncio.create_task(self._download_single_pdf(pdf_url, candidate_path))
+            candidates[task] = (pdf_url, candidate_path)
+        pending = set(candidates)
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    digest = task.result()
+                    if digest and winner is None:
+                        winner = (*candidates[task], digest)
+            
+            if winner:
+                pdf_url, candidate_path, digest = winner
+                await asyncio.to_thread(self._store_deduplicated, digest, candidate_path, filepath, article_url)
+                self.successful_urls[article_url] = pdf_url
+                self.successful_urls.move_to_end(article_url)
+                if len(self.successful_urls) > SUCCESSFUL_URLS_MAX:
+                    self.successful_urls.popitem(last=False)  # 淘汰最久未用的条目
+                return True
+            return False
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                # 等待被取消的任务清理各自的.part文件
+                await asyncio.gather(*pending, return_exceptions=True)
+            # 清理同时完成但未胜出的候选文件
+            for _, candidate_path in candidates.values():
+                with contextlib.suppress(OSError):
+                    os.remove(candidate_path)
+    
+    @staticmethod
+    def _prepare_download_dir(download_path: Optional[str]) -> Path:
+        """解析下载目录并确保其存在；批量下载时只调用一次，而不是每个文件一次"""
         if download_path:
             base_path = Path(download_path)
         else:
             base_path = Path.home() / "Downloads" / "ScholarDock_PDFs"
+        base_path.mkdir(parents=True, exist_ok=True)
+        return base_path
+    
+    async def download_article_pdf(self, article_title: str, article_url: str,
+                                 download_path: Optional[str] = None) -> Optional[str]:
+        """下载单篇文章的PDF"""
+        base_path = self._prepare_download_dir(download_path)
+        return await self._download_article_to(base_path, article_title, article_url)
+    
+    async def _download_article_to(self, base_path: Path, article_title: str, article_url: str) -> Optional[str]:
+        """把单篇文章的PDF下载到已存在的目录base_path中"""
         
         # 创建文件名
         filename = self._sanitize_filename(article_title)
@@ -384,12 +712,28 @@ class PDFDownloader:
             logger.info(f"File already exists, skipping: {filepath}")
             return str(filepath)
         
-        # 获取可能的PDF链接
+        # 同一篇文章之前以其他标题下载过：直接硬链接，不再重新下载
+        existing_path = await asyncio.to_thread(self._link_downloaded, base_path, article_url, str(filepath))
+        if existing_path:
+            logger.info(f"Article already downloaded, linked {filepath} -> {existing_path}")
+            return str(filepath)
+        
+        # 获取可能的PDF链接，之前对同一文章成功过的链接优先尝试
         pdf_urls = self._extract_pdf_urls(article_url)
+        known_pdf_url = self.successful_urls.get(article_url)
+        if known_pdf_url:
+            self.successful_urls.move_to_end(article_url)
+            pdf_urls = (known_pdf_url,) + tuple(url for url in pdf_urls if url != known_pdf_url)
         
-        # 尝试下载每个可能的PDF链接
-        for pdf_url in pdf_urls:
-            if await self._download_single_pdf(pdf_url, str(filepath)):
+        # 上次成功的链接、直接链接和已知站点换算出的PDF链接依次单独尝试，
+        # 免得对同一主机发出一批注定失败的猜测请求；都失败后其余猜测出来的候选链接再并行竞速
+        leading_urls = tuple(
+            url for url in dict.fromkeys((known_pdf_url, article_url, self._host_pdf_url(article_url)))
+            if url in pdf_urls
+        )
+        guessed_urls = tuple(url for url in pdf_urls if url not in leading_urls)
+        for candidate_urls in (*((url,) for url in leading_urls), guessed_urls):
+            if candidate_urls and await self._download_first_pdf(article_url, candidate_urls, str(filepath)):
                 return str(filepath)
         
         # 如果常规方法都失败了，尝试浏览器自动化（实验性功能）
@@ -401,41 +745,44 @@ class PDFDownloader:
         logger.warning(f"Failed to download PDF for: {article_title}")
         return None
     
-    async def download_multiple_pdfs(self, articles: List[dict],
+    async def download_multiple_pdfs(self, articles: List[PDFItem],
                                    download_path: Optional[str] = None,
-                                   max_concurrent: int = 3) -> dict:
-        """批量下载多个PDF文件"""
-        results = {
-            'successful': [],
-            'failed': [],
-            'total': len(articles)
-        }
-        
-        # 并发下载，但限制并发数量避免过载
-        semaphore = asyncio.Semaphore(max_concurrent)  # 使用传入的并发数量
-        
-        async def download_with_semaphore(article):
+                                   max_concurrent: int = 32) -> List[dict]:
+        """批量下载多个PDF文件，返回可直接用于响应的结果列表"""
+        return [
+            result
+            async for result in self.iter_download_results(articles, download_path, max_concurrent)
+        ]
+    
+    async def _download_item(self, article: PDFItem, base_path: Path,
+                             semaphore: asyncio.Semaphore) -> dict:
+        """下载单个条目并返回格式化结果"""
+        url = article.pdf_url or article.url  # 优先使用pdf_url
+        try:
             async with semaphore:
-                filepath = await self.download_article_pdf(
-                    article['title'], 
-                    article.get('pdf_url', article['url']),  # 优先使用pdf_url
-                    download_path
-                )
-                if filepath:
-                    results['successful'].append({
-                        'title': article['title'],
-                        'filepath': filepath
-                    })
-                else:
-                    results['failed'].append({
-                        'title': article['title'],
-                        'url': article.get('pdf_url', article['url'])
-                    })
-        
-        # 创建所有下载任务
-        tasks = [download_with_semaphore(article) for article in articles]
-        
-        # 等待所有任务完成
-        await asyncio.gather(*tasks, return_exceptions=True)
+                filepath = await self._download_article_to(base_path, article.title, url)
+        except Exception as e:
+            logger.error(f"Error downloading PDF for {article.title}: {e}")
+            filepath = None
         
-        return results
+        if filepath:
+            return {'success': True, 'title': article.title, 'filepath': filepath}
+        return {'success': False, 'title': article.title, 'url': url}
+    
+    async def iter_download_results(self, articles: List[PDFItem],
+                                    download_path: Optional[str] = None,
+                                    max_concurrent: int = 32) -> AsyncIterator[dict]:
+        """批量下载多个PDF文件，按完成顺序逐个产出结果"""
+        base_path = self._prepare_download_dir(download_path)  # 整个批次只创建一次目录
+        semaphore = asyncio.Semaphore(max_concurrent)
+        tasks = [
+            asyncio.create_task(self._download_item(article, base_path, semaphore))
+            for article in articles
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 客户端断开时取消剩余的下载
+            for task in tasks:
+                task.cancel()
@@ -3,7 +3,7 @@ import { useQuery } from 'react-query'
 import { useState } from 'react'
 import { motion } from 'framer-motion'
 import { ExternalLink, Users, Calendar, Quote, Trophy, TrendingUp, Filter, Download, SortDesc, ChevronLeft, ChevronRight, FileDown, CheckSquare, Square, Settings } from 'lucide-react'
-import { searchAPI, pdfAPI } from '../services/api'
+import { searchAPI, pdfAPI, PDFDownloadRequest } from '../services/api'
 import { useMutation } from 'react-query'
 import CitationChart from '../components/CitationChart'
 
@@ -24,11 +24,15 @@ const ResultsPage = () => {
   const { data: search, isLoading } = useQuery(
     ['searchDetails', searchId],
     () => searchAPI.getSearchDetails(parseInt(searchId!)),
-    { enabled: !!searchId }
+    // A stored search never changes, so cached details never go stale
+    { enabled: !!searchId, staleTime: Infinity }
   )
 
   // PDF下载mutation
-  const downloadMutation = useMutation(pdfAPI.downloadMultiple, {
+  const downloadMutation = useMutation((request: PDFDownloadRequest) =>
+    pdfAPI.downloadStream(request, (_, done) => {
+      setDownloadProgress(`正在下载... 已完成 ${done}/${request.articles.length}`)
+    }), {
     onMutate: () => {
       setDownloadProgress('正在准备下载...')
       setDownloadResults([])
@@ -1,6 +1,6 @@
 import { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { useMutation } from 'react-query'
+import { useMutation, useQueryClient } from 'react-query'
 import { motion } from 'framer-motion'
 import { Search, Loader2, Calendar, SortDesc, FileText } from 'lucide-react'
 import toast from 'react-hot-toast'
@@ -8,6 +8,7 @@ import { searchAPI, SearchRequest } from '../services/api'
 
 const SearchPage = () => {
   const navigate = useNavigate()
+  const queryClient = useQueryClient()
   const currentYear = new Date().getFullYear()
   
   const [formData, setFormData] = useState<SearchRequest>({
@@ -21,6 +22,14 @@ const SearchPage = () => {
   const searchMutation = useMutation(searchAPI.search, {
     onSuccess: (data) => {
       toast.success(`Found ${data.total_results} articles`)
+      // Articles are stored in the background, so seed the results page from this response
+      queryClient.setQueryData(['searchDetails', String(data.search_id)], {
+        id: data.search_id,
+        keyword: data.keyword,
+        total_results: data.total_results,
+        created_at: data.created_at,
+        articles: data.articles,
+      })
       navigate(`/results/${data.search_id}`)
     },
     onError: () => {
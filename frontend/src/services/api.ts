@@ -33,6 +33,7 @@ export interface SearchResponse {
   search_id: number
   keyword: string
   total_results: number
+  created_at: string
   articles: Article[]
   message: string
 }
@@ -60,7 +61,7 @@ export const searchAPI = {
   },
 
   getSearchDetails: async (searchId: number): Promise<Search> => {
-    const { data } = await api.get<Search>(`/search/${searchId}`)
+    const { data } = await api.get<Search>(`/search/${searchId}`, { params: { expand: true } })
     return data
   },
 
@@ -106,6 +107,46 @@ export const pdfAPI = {
     return data
   },
 
+  // 流式批量下载：每完成一个PDF就回调一次，最后返回汇总结果
+  downloadStream: async (
+    request: PDFDownloadRequest,
+    onResult?: (result: PDFDownloadResult, done: number) => void
+  ): Promise<PDFDownloadResponse> => {
+    const response = await fetch(`${api.defaults.baseURL}/download-pdf/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(request),
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP ${response.status}`)
+    }
+
+    const results: PDFDownloadResult[] = []
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffered = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      buffered += decoder.decode(value, { stream: !done })
+      const lines = buffered.split('\n')
+      buffered = lines.pop() ?? ''
+      for (const line of lines) {
+        if (!line.trim()) continue
+        const result: PDFDownloadResult = JSON.parse(line)
+        results.push(result)
+        onResult?.(result, results.length)
+      }
+      if (done) break
+    }
+
+    const successCount = results.filter(r => r.success).length
+    return {
+      success: true,
+      message: `Download completed: ${successCount}/${results.length} files downloaded successfully`,
+      results,
+    }
+  },
+
   downloadSingle: async (
     title: string,
     url: string,